@@ -0,0 +1,26 @@
+"""add owner index
+
+Revision ID: ed44ecf1484f
+Revises: 3e574195b9e1
+Create Date: 2026-10-15 03:27:12.581204
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "ed44ecf1484f"
+down_revision = "3e574195b9e1"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index(
+        "account_owner_idx",
+        "service_accounts",
+        ["owner"],
+    )
+
+
+def downgrade():
+    op.drop_index("account_owner_idx", table_name="service_accounts")
@@ -2,17 +2,20 @@ import logging
 from collections.abc import AsyncIterator, Awaitable, Callable
 from contextlib import AsyncExitStack, asynccontextmanager
 from importlib.metadata import version
+from typing import Any
 
 import aiohttp
 import aiohttp.web
 import aiohttp_cors
+import orjson
+import uvloop
+from aiohttp import hdrs
 from aiohttp.web import (
     HTTPBadRequest,
     HTTPInternalServerError,
     Request,
     Response,
     StreamResponse,
-    json_response,
     middleware,
 )
 from aiohttp.web_exceptions import (
@@ -26,13 +29,12 @@ from aiohttp.web_exceptions import (
 from aiohttp_apispec import docs, request_schema, response_schema, setup_aiohttp_apispec
 from aiohttp_security import check_authorized
 from marshmallow import ValidationError
-from neuro_auth_client import AuthClient, User
+from neuro_auth_client import AuthClient
 from neuro_auth_client.security import AuthScheme, setup_security
 from neuro_logging import init_logging, notrace, setup_sentry, setup_zipkin_tracer
 
 from .config import Config, CORSConfig, PlatformAuthConfig
 from .config_factory import EnvironConfigFactory
-from .identity import untrusted_user
 from .postgres import create_postgres_pool
 from .schema import (
     ClientErrorSchema,
@@ -45,13 +47,41 @@ from .service import (
     AccountsService,
     NoAccessToRoleError,
     ServiceAccount,
+    ServiceAccountWithToken,
 )
 from .storage.base import ExistsError, NotExistsError, Storage
 from .storage.postgres import PostgresStorage
-from .utils import accepts_ndjson, auto_close, ndjson_error_handler
+from .utils import accepts_ndjson, auto_close, json_response, ndjson_error_handler
 
 logger = logging.getLogger(__name__)
 
+NDJSON_FLUSH_SIZE = 64 * 1024
+
+_SA_CREATE_SCHEMA = ServiceAccountCreateSchema()
+
+
+def _dump_service_account(account: ServiceAccount) -> dict[str, Any]:
+    # Mirrors ServiceAccountSchema field by field, skipping Marshmallow
+    return {
+        "name": account.name,
+        "default_cluster": account.default_cluster,
+        "default_project": account.default_project,
+        "default_org": account.default_org,
+        "id": account.id,
+        "role": account.role,
+        "owner": account.owner,
+        "created_at": account.created_at.isoformat(),
+        "role_deleted": False,
+    }
+
+
+def _dump_service_account_with_token(
+    account: ServiceAccountWithToken,
+) -> dict[str, Any]:
+    payload = _dump_service_account(account)
+    payload["token"] = account.token
+    return payload
+
 
 class ApiHandler:
     def register(self, app: aiohttp.web.Application) -> None:
@@ -64,7 +94,7 @@ class ApiHandler:
 
     @notrace
     async def handle_ping(self, request: Request) -> Response:
-        return Response(text="Pong")
+        return Response(body=b"Pong", content_type="text/plain", charset="utf-8")
 
     @notrace
     async def handle_secured_ping(self, request: Request) -> Response:
@@ -91,21 +121,12 @@ class ServiceAccountsApiHandler:
     def service(self) -> AccountsService:
         return self._app["service"]
 
-    async def _get_untrusted_user(self, request: Request) -> User:
-        identity = await untrusted_user(request)
-        return User(name=identity.name)
-
     async def _resolve_service_account(self, request: Request) -> ServiceAccount:
         id_or_name = request.match_info["id_or_name"]
         try:
-            account = await self.service.get(id_or_name)
+            return await self.service.get_by_id_or_name(id_or_name, request["username"])
         except NotExistsError:
-            user = await self._get_untrusted_user(request)
-            try:
-                account = await self.service.get_by_name(id_or_name, user.name)
-            except NotExistsError:
-                raise HTTPNotFound(text=f"Service account {id_or_name} not found")
-        return account
+            raise HTTPNotFound(text=f"Service account {id_or_name} not found")
 
     @docs(
         tags=["service_accounts"],
@@ -116,47 +137,50 @@ class ServiceAccountsApiHandler:
         self,
         request: aiohttp.web.Request,
     ) -> aiohttp.web.StreamResponse:
-        username = await check_authorized(request)
-        bake_images = self.service.list(owner=username)
-        async with auto_close(bake_images):  # type: ignore[arg-type]
-            if accepts_ndjson(request):
-                response = aiohttp.web.StreamResponse()
-                response.headers["Content-Type"] = "application/x-ndjson"
-                await response.prepare(request)
-                async with ndjson_error_handler(request, response):
-                    async for image in bake_images:
-                        payload_line = ServiceAccountSchema().dumps(image)
-                        await response.write(payload_line.encode() + b"\n")
-                return response
-            else:
-                response_payload = [
-                    ServiceAccountSchema().dump(image) async for image in bake_images
-                ]
-                return aiohttp.web.json_response(
-                    data=response_payload, status=HTTPOk.status_code
-                )
+        if accepts_ndjson(request):
+            return await self._list_ndjson(request)
+        return await self._list_json(request)
+
+    async def _list_ndjson(self, request: Request) -> StreamResponse:
+        accounts = self.service.list(owner=request["username"])
+        async with auto_close(accounts):  # type: ignore[arg-type]
+            response = aiohttp.web.StreamResponse()
+            response.headers["Content-Type"] = "application/x-ndjson"
+            await response.prepare(request)
+            buffer = bytearray()
+            async with ndjson_error_handler(request, response):
+                try:
+                    async for account in accounts:
+                        buffer += orjson.dumps(_dump_service_account(account))
+                        buffer += b"\n"
+                        if len(buffer) >= NDJSON_FLUSH_SIZE:
+                            chunk = bytes(buffer)
+                            buffer.clear()
+                            await response.write(chunk)
+                except Exception:
+                    # Rows listed before the failure still go out ahead of the
+                    # error line written by ndjson_error_handler
+                    if buffer:
+                        await response.write(bytes(buffer))
+                    raise
+                if buffer:
+                    await response.write(bytes(buffer))
+            return response
+
+    async def _list_json(self, request: Request) -> Response:
+        accounts = await self.service.list_all(owner=request["username"])
+        response_payload = [_dump_service_account(account) for account in accounts]
+        return json_response(response_payload, status=HTTPOk.status_code)
 
     @docs(tags=["service_accounts"], summary="Get service account by id or name")
     @response_schema(ServiceAccountSchema(), HTTPOk.status_code)
     async def get(self, request: aiohttp.web.Request) -> aiohttp.web.Response:
-        username = await check_authorized(request)
         account = await self._resolve_service_account(request)
-        # TODO: replace with proper permissions check when implemented
-        if account.owner != username:
-            id_or_name = request.match_info["id_or_name"]
-            raise HTTPNotFound(text=f"Service account {id_or_name} not found")
-        return aiohttp.web.json_response(
-            data=ServiceAccountSchema().dump(account), status=HTTPOk.status_code
-        )
+        return json_response(_dump_service_account(account), status=HTTPOk.status_code)
 
     @docs(tags=["service_accounts"], summary="Revoke and delete service account")
     async def delete(self, request: aiohttp.web.Request) -> aiohttp.web.Response:
-        username = await check_authorized(request)
         account = await self._resolve_service_account(request)
-        # TODO: replace with proper permissions check when implemented
-        if account.owner != username:
-            id_or_name = request.match_info["id_or_name"]
-            raise HTTPNotFound(text=f"Service account {id_or_name} not found")
         await self.service.delete(account.id)
         return aiohttp.web.Response(status=HTTPNoContent.status_code)
 
@@ -179,9 +203,8 @@ class ServiceAccountsApiHandler:
         self,
         request: aiohttp.web.Request,
     ) -> aiohttp.web.Response:
-        username = await check_authorized(request)
-        schema = ServiceAccountCreateSchema()
-        data_raw = schema.load(await request.json())
+        username = request["username"]
+        data_raw = _SA_CREATE_SCHEMA.load(orjson.loads(await request.read()))
         data = AccountCreateData(
             **data_raw,
             owner=username,
@@ -198,8 +221,8 @@ class ServiceAccountsApiHandler:
             )
         except NoAccessToRoleError:
             raise HTTPForbidden
-        return aiohttp.web.json_response(
-            data=ServiceAccountWithTokenSchema().dump(account),
+        return json_response(
+            _dump_service_account_with_token(account),
             status=HTTPCreated.status_code,
         )
 
@@ -210,14 +233,11 @@ async def handle_exceptions(
 ) -> StreamResponse:
     try:
         return await handler(request)
-    except ValueError as e:
-        payload = {"error": str(e)}
-        return json_response(payload, status=HTTPBadRequest.status_code)
-    except ValidationError as e:
-        payload = {"error": str(e)}
-        return json_response(payload, status=HTTPBadRequest.status_code)
     except aiohttp.web.HTTPException:
         raise
+    except (ValueError, ValidationError) as e:
+        payload = {"error": str(e)}
+        return json_response(payload, status=HTTPBadRequest.status_code)
     except Exception as e:
         msg_str = f"Unexpected exception: {str(e)}. Path with query: {request.path_qs}."
         logging.exception(msg_str)
@@ -225,15 +245,25 @@ async def handle_exceptions(
         return json_response(payload, status=HTTPInternalServerError.status_code)
 
 
-async def create_api_v1_app() -> aiohttp.web.Application:
+@middleware
+async def authorize(
+    request: Request, handler: Callable[[Request], Awaitable[StreamResponse]]
+) -> StreamResponse:
+    # CORS preflight requests carry no credentials
+    if request.method != hdrs.METH_OPTIONS:
+        request["username"] = await check_authorized(request)
+    return await handler(request)
+
+
+def create_api_v1_app() -> aiohttp.web.Application:
     api_v1_app = aiohttp.web.Application()
     api_v1_handler = ApiHandler()
     api_v1_handler.register(api_v1_app)
     return api_v1_app
 
 
-async def create_service_accounts_app(config: Config) -> aiohttp.web.Application:
-    app = aiohttp.web.Application()
+def create_service_accounts_app(config: Config) -> aiohttp.web.Application:
+    app = aiohttp.web.Application(middlewares=[authorize])
     handler = ServiceAccountsApiHandler(app, config)
     handler.register(app)
     return app
@@ -249,7 +279,7 @@ def _setup_cors(app: aiohttp.web.Application, config: CORSConfig) -> None:
     if not config.allowed_origins:
         return
 
-    logger.info(f"Setting up CORS with allowed origins: {config.allowed_origins}")
+    logger.info("Setting up CORS with allowed origins: %s", config.allowed_origins)
     default_options = aiohttp_cors.ResourceOptions(
         allow_credentials=True,
         expose_headers="*",
@@ -258,18 +288,25 @@ def _setup_cors(app: aiohttp.web.Application, config: CORSConfig) -> None:
     cors = aiohttp_cors.setup(
         app, defaults={origin: default_options for origin in config.allowed_origins}
     )
+    cors_add = cors.add
     for route in app.router.routes():
-        logger.debug(f"Setting up CORS for {route}")
-        cors.add(route)
+        logger.debug("Setting up CORS for %s", route)
+        cors_add(route)
 
 
 package_version = version(__package__)
+service_version_header = f"platform-service-accounts-api/{package_version}"
 
 
 async def add_version_to_header(request: Request, response: StreamResponse) -> None:
-    response.headers[
-        "X-Service-Version"
-    ] = f"platform-service-accounts-api/{package_version}"
+    response.headers["X-Service-Version"] = service_version_header
+
+
+DOCS_PREFIX = "/api/docs/v1/service_accounts"
+DOCS_SECURITY: list[dict[str, list[str]]] = [{"jwt": []}]
+DOCS_SECURITY_DEFINITIONS = {
+    "jwt": {"type": "apiKey", "name": "Authorization", "in": "header"},
+}
 
 
 async def create_app(config: Config) -> aiohttp.web.Application:
@@ -306,10 +343,10 @@ async def create_app(config: Config) -> aiohttp.web.Application:
 
     app.cleanup_ctx.append(_init_app)
 
-    api_v1_app = await create_api_v1_app()
+    api_v1_app = create_api_v1_app()
     app["api_v1_app"] = api_v1_app
 
-    service_accounts_app = await create_service_accounts_app(config)
+    service_accounts_app = create_service_accounts_app(config)
     app["service_accounts_app"] = service_accounts_app
     api_v1_app.add_subapp("/service_accounts", service_accounts_app)
 
@@ -319,18 +356,15 @@ async def create_app(config: Config) -> aiohttp.web.Application:
 
     _setup_cors(app, config.cors)
     if config.enable_docs:
-        prefix = "/api/docs/v1/service_accounts"
         setup_aiohttp_apispec(
             app=app,
             title="Service Accounts API documentation",
             version="v1",
-            url=f"{prefix}/swagger.json",
-            static_path=f"{prefix}/static",
-            swagger_path=f"{prefix}/ui",
-            security=[{"jwt": []}],
-            securityDefinitions={
-                "jwt": {"type": "apiKey", "name": "Authorization", "in": "header"},
-            },
+            url=f"{DOCS_PREFIX}/swagger.json",
+            static_path=f"{DOCS_PREFIX}/static",
+            swagger_path=f"{DOCS_PREFIX}/ui",
+            security=DOCS_SECURITY,
+            securityDefinitions=DOCS_SECURITY_DEFINITIONS,
         )
     return app
 
@@ -359,6 +393,7 @@ def main() -> None:  # pragma: no coverage
     config = EnvironConfigFactory().create()
     logging.info("Loaded config: %r", config)
     setup_tracing(config)
+    uvloop.install()
     aiohttp.web.run_app(
         create_app(config), host=config.server.host, port=config.server.port
     )
@@ -1,4 +1,3 @@
-from collections.abc import Sequence
 from dataclasses import dataclass, field
 from typing import Optional
 
@@ -21,7 +20,7 @@ class PlatformAuthConfig:
 
 @dataclass(frozen=True)
 class CORSConfig:
-    allowed_origins: Sequence[str] = ()
+    allowed_origins: tuple[str, ...] = ()
 
 
 @dataclass(frozen=True)
@@ -53,6 +52,13 @@ class PostgresConfig:
     connect_timeout_s: float = 60.0
     command_timeout_s: Optional[float] = 60.0
 
+    def __post_init__(self) -> None:
+        if self.pool_min_size > self.pool_max_size:
+            raise ValueError(
+                f"Postgres pool min size ({self.pool_min_size}) "
+                f"exceeds max size ({self.pool_max_size})"
+            )
+
 
 @dataclass(frozen=True)
 class Config:
@@ -1,7 +1,6 @@
 import logging
 import os
 import pathlib
-from collections.abc import Sequence
 from typing import Optional
 
 from yarl import URL
@@ -20,10 +19,14 @@ from .config import (
 
 logger = logging.getLogger(__name__)
 
+_PARENT_PATH = pathlib.Path(__file__).resolve().parent.parent
+_ALEMBIC_INI_PATH = str(_PARENT_PATH / "alembic.ini")
+_ALEMBIC_SCRIPT_PATH = str(_PARENT_PATH / "alembic")
+
 
 class EnvironConfigFactory:
     def __init__(self, environ: Optional[dict[str, str]] = None) -> None:
-        self._environ = environ or os.environ
+        self._environ = dict(environ or os.environ)
 
     def create(self) -> Config:
         enable_docs = (
@@ -52,10 +55,10 @@ class EnvironConfigFactory:
         return PlatformAuthConfig(url=url, token=token)
 
     def create_cors(self) -> CORSConfig:
-        origins: Sequence[str] = CORSConfig.allowed_origins
-        origins_str = self._environ.get("NP_CORS_ORIGINS", "").strip()
-        if origins_str:
-            origins = origins_str.split(",")
+        origins_str = self._environ.get("NP_CORS_ORIGINS", "")
+        origins = tuple(
+            origin for origin in map(str.strip, origins_str.split(",")) if origin
+        )
         return CORSConfig(allowed_origins=origins)
 
     def create_zipkin(self) -> Optional[ZipkinConfig]:
@@ -112,10 +115,7 @@ class EnvironConfigFactory:
         )
 
     def create_alembic(self, postgres_dsn: str) -> AlembicConfig:
-        parent_path = pathlib.Path(__file__).resolve().parent.parent
-        ini_path = str(parent_path / "alembic.ini")
-        script_path = str(parent_path / "alembic")
-        config = AlembicConfig(ini_path)
-        config.set_main_option("script_location", script_path)
+        config = AlembicConfig(_ALEMBIC_INI_PATH)
+        config.set_main_option("script_location", _ALEMBIC_SCRIPT_PATH)
         config.set_main_option("sqlalchemy.url", postgres_dsn.replace("%", "%%"))
         return config
@@ -1,7 +1,9 @@
 import asyncio
 from contextlib import asynccontextmanager
+from typing import Any
 
-from asyncpg import create_pool
+import orjson
+from asyncpg import Connection, create_pool
 from asyncpg.pool import Pool
 
 import alembic
@@ -9,6 +11,29 @@ import alembic
 from .config import PostgresConfig
 
 
+# Binary JSONB is a version byte followed by the JSON text
+_JSONB_VERSION = b"\x01"
+
+
+def _encode_jsonb(value: Any) -> bytes:
+    return _JSONB_VERSION + orjson.dumps(value)
+
+
+def _decode_jsonb(data: bytes) -> Any:
+    return orjson.loads(data[1:])
+
+
+async def _init_connection(conn: Connection) -> None:
+    # Decode JSONB columns straight to Python objects with orjson
+    await conn.set_type_codec(
+        "jsonb",
+        encoder=_encode_jsonb,
+        decoder=_decode_jsonb,
+        schema="pg_catalog",
+        format="binary",
+    )
+
+
 @asynccontextmanager
 async def create_postgres_pool(db_config: PostgresConfig) -> Pool:
     async with create_pool(
@@ -17,6 +42,7 @@ async def create_postgres_pool(db_config: PostgresConfig) -> Pool:
         max_size=db_config.pool_max_size,
         timeout=db_config.connect_timeout_s,
         command_timeout=db_config.command_timeout_s,
+        init=_init_connection,
     ) as pool:
         yield pool
 
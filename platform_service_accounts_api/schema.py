@@ -12,18 +12,23 @@ F = TypeVar("F", bound=Callable[..., Any])
 
 def query_schema(**kwargs: fields.Field) -> Callable[[F], F]:
     schema: Schema = Schema.from_dict(kwargs)()  # type: ignore
+    list_fields = frozenset(
+        name for name, field in schema.fields.items() if isinstance(field, fields.List)
+    )
 
     def _decorator(handler: F) -> F:
         @querystring_schema(schema)
         @functools.wraps(handler)
         async def _wrapped(self: Any, request: aiohttp.web.Request) -> Any:
-            query_data = {
-                key: request.query.getall(key)
-                if len(request.query.getall(key)) > 1
-                or isinstance(schema.fields.get(key), fields.List)
-                else request.query[key]
-                for key in request.query.keys()
-            }
+            query = request.query
+            query_data = {}
+            for key in query.keys():
+                if key in query_data:
+                    continue
+                values = query.getall(key)
+                query_data[key] = (
+                    values if len(values) > 1 or key in list_fields else values[0]
+                )
             validated = schema.load(query_data)
             return await handler(self, request, **validated)
 
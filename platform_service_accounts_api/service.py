@@ -1,12 +1,12 @@
-import base64
+import binascii
 import datetime
-import json
 import logging
 import secrets
 from collections.abc import AsyncIterator
-from dataclasses import asdict, dataclass
+from dataclasses import dataclass, fields
 from typing import Optional
 
+import orjson
 from aiohttp import ClientResponseError
 from neuro_auth_client import AuthClient, User
 from yarl import URL
@@ -44,7 +44,7 @@ class AccountsService:
     ) -> None:
         self._storage = storage
         self._auth_client = auth_client
-        self._api_base_url = api_base_url
+        self._api_base_url_str = str(api_base_url)
 
     def _make_token_uri(self, account_id: str) -> str:
         return f"token://service_account/{account_id}"
@@ -53,12 +53,12 @@ class AccountsService:
         token = {
             "token": auth_token,
             "cluster": account.default_cluster,
-            "url": str(self._api_base_url),
+            "url": self._api_base_url_str,
             "project_name": account.default_project,
         }
         if account.default_org:
             token["org_name"] = account.default_org
-        return base64.b64encode(json.dumps(token).encode()).decode()
+        return binascii.b2a_base64(orjson.dumps(token), newline=False).decode("ascii")
 
     async def create(self, data: AccountCreateData) -> ServiceAccountWithToken:
         if data.name:
@@ -68,7 +68,7 @@ class AccountsService:
 
         account = await self._storage.create(
             ServiceAccountData(
-                **asdict(data),
+                **{field.name: getattr(data, field.name) for field in fields(data)},
                 role=role,
                 created_at=datetime.datetime.now(datetime.timezone.utc),
             )
@@ -80,7 +80,10 @@ class AccountsService:
         except Exception:
             await self._storage.delete(account.id)
             raise
-        return ServiceAccountWithToken(**asdict(account), token=token)
+        return ServiceAccountWithToken(
+            **{field.name: getattr(account, field.name) for field in fields(account)},
+            token=token,
+        )
 
     async def _check_no_such_role(self, role: str) -> bool:
         try:
@@ -95,11 +98,15 @@ class AccountsService:
     async def get_by_name(self, name: str, owner: str) -> ServiceAccount:
         return await self._storage.get_by_name(name, owner)
 
+    async def get_by_id_or_name(self, id_or_name: str, owner: str) -> ServiceAccount:
+        return await self._storage.get_by_id_or_name(id_or_name, owner)
+
+    async def list_all(self, owner: str) -> list[ServiceAccount]:
+        return await self._storage.list_all(owner)
+
     async def list(self, owner: str) -> AsyncIterator[ServiceAccount]:
         async for account in self._storage.list(owner):
-            yield ServiceAccount(
-                **asdict(account),
-            )
+            yield account
 
     async def delete(self, id: str) -> None:
         account = await self._storage.get(id)
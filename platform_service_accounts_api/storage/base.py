@@ -78,6 +78,17 @@ class Storage(ABC):
     async def get_by_name(self, name: str, owner: str) -> ServiceAccount:
         pass
 
+    @abstractmethod
+    async def get_by_id_or_name(self, id_or_name: str, owner: str) -> ServiceAccount:
+        pass
+
+    @abstractmethod
+    async def list_all(
+        self,
+        owner: Optional[str] = None,
+    ) -> list[ServiceAccount]:
+        pass
+
     @abstractmethod
     def list(
         self,
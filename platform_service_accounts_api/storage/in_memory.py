@@ -14,6 +14,7 @@ from .base import (
 class InMemoryStorage(Storage):
     def __init__(self) -> None:
         self._items: dict[str, ServiceAccount] = {}
+        self._ids_by_name: dict[tuple[str, str], str] = {}
 
     def _gen_id(self) -> str:
         return secrets.token_hex(8)
@@ -23,6 +24,8 @@ class InMemoryStorage(Storage):
         new_id = self._gen_id()
         account = ServiceAccount.from_data_obj(new_id, data)
         self._items[new_id] = account
+        if account.name is not None:
+            self._ids_by_name[(account.name, account.owner)] = new_id
         return account
 
     async def get(self, id: str) -> ServiceAccount:
@@ -31,13 +34,28 @@ class InMemoryStorage(Storage):
         return self._items[id]
 
     async def get_by_name(self, name: str, owner: str) -> ServiceAccount:
-        for item in self._items.values():
-            if item.name == name and item.owner == owner:
-                return item
-        raise NotExistsError
+        id = self._ids_by_name.get((name, owner))
+        if id is None:
+            raise NotExistsError
+        return self._items[id]
+
+    async def get_by_id_or_name(self, id_or_name: str, owner: str) -> ServiceAccount:
+        item = self._items.get(id_or_name)
+        if item is not None and item.owner == owner:
+            return item
+        return await self.get_by_name(id_or_name, owner)
 
     async def delete(self, id: str) -> None:
-        self._items.pop(id)
+        account = self._items.pop(id)
+        if account.name is not None:
+            del self._ids_by_name[(account.name, account.owner)]
+
+    async def list_all(self, owner: Optional[str] = None) -> list[ServiceAccount]:
+        return [
+            item
+            for item in self._items.values()
+            if owner is None or item.owner == owner
+        ]
 
     async def list(self, owner: Optional[str] = None) -> AsyncIterator[ServiceAccount]:
         for item in self._items.values():
@@ -1,10 +1,8 @@
-import json
 import uuid
 from collections.abc import AsyncIterator
-from dataclasses import asdict, dataclass
+from dataclasses import dataclass, fields
 from typing import Any, Optional
 
-import asyncpgsa
 import sqlalchemy as sa
 import sqlalchemy.dialects.postgresql as sapg
 import sqlalchemy.sql as sasql
@@ -23,6 +21,33 @@ from .base import (
 )
 
 
+_DIALECT = sapg.dialect(paramstyle="pyformat")
+
+# ServiceAccount fields stored in the JSONB payload rather than own columns
+_PAYLOAD_FIELDS = tuple(
+    field.name
+    for field in fields(ServiceAccount)
+    if field.name not in ("id", "name", "owner", "created_at")
+)
+
+
+@dataclass(frozen=True)
+class _Query:
+    sql: str
+    param_names: tuple[str, ...]
+
+    @classmethod
+    def compile(cls, query: sasql.ClauseElement) -> "_Query":
+        """Render a query built with named bind params to asyncpg SQL once."""
+        compiled = query.compile(dialect=_DIALECT)
+        param_names = tuple(compiled.params)
+        placeholders = {name: f"${i}" for i, name in enumerate(param_names, start=1)}
+        return cls(sql=compiled.string % placeholders, param_names=param_names)
+
+    def args(self, **params: Any) -> list[Any]:
+        return [params[name] for name in self.param_names]
+
+
 @dataclass(frozen=True)
 class ServiceAccountTables:
     service_accounts: sa.Table
@@ -48,6 +73,8 @@ class ServiceAccountTables:
 
 class PostgresStorage(Storage):
     ID_PREFIX = "service-account"
+    # Rows fetched per cursor round-trip, asyncpg defaults to 50
+    CURSOR_PREFETCH = 256
 
     def __init__(
         self,
@@ -55,61 +82,93 @@ class PostgresStorage(Storage):
     ):
         self._table = ServiceAccountTables.create().service_accounts
         self._pool = pool
+        self._compile_queries()
+
+    def _compile_queries(self) -> None:
+        # Every query has a fixed shape, so render SQL once instead of
+        # running the SQLAlchemy compiler on each call
+        table = self._table
+        owner = sa.bindparam("owner")
+        by_id = table.c.id == sa.bindparam("id")
+        by_id_or_name = table.c.id == sa.bindparam("id_or_name")
+        self._create_query = _Query.compile(table.insert())
+        self._get_query = _Query.compile(table.select().where(by_id))
+        self._get_by_name_query = _Query.compile(
+            table.select()
+            .where(table.c.owner == owner)
+            .where(table.c.name == sa.bindparam("name"))
+        )
+        self._get_by_id_or_name_query = _Query.compile(
+            table.select()
+            .where(table.c.owner == owner)
+            .where(sa.or_(by_id_or_name, table.c.name == sa.bindparam("id_or_name")))
+            # An exact id match wins over a name match
+            .order_by(sa.desc(by_id_or_name))
+            .limit(sa.literal_column("1"))
+        )
+        self._delete_query = _Query.compile(table.delete().where(by_id))
+        self._list_query = _Query.compile(table.select())
+        self._list_by_owner_query = _Query.compile(
+            table.select().where(table.c.owner == owner)
+        )
 
     async def _execute(
-        self, query: sasql.ClauseElement, conn: Optional[Connection] = None
+        self, query: _Query, conn: Optional[Connection] = None, **params: Any
     ) -> str:
-        query_string, params = asyncpgsa.compile_query(query)
         conn = conn or self._pool
-        return await conn.execute(query_string, *params)
+        return await conn.execute(query.sql, *query.args(**params))
 
     async def _fetchrow(
-        self, query: sasql.ClauseElement, conn: Optional[Connection] = None
+        self, query: _Query, conn: Optional[Connection] = None, **params: Any
     ) -> Optional[Record]:
-        query_string, params = asyncpgsa.compile_query(query)
         conn = conn or self._pool
-        return await conn.fetchrow(query_string, *params)
+        return await conn.fetchrow(query.sql, *query.args(**params))
 
-    def _cursor(self, query: sasql.ClauseElement, conn: Connection) -> CursorFactory:
-        query_string, params = asyncpgsa.compile_query(query)
-        return conn.cursor(query_string, *params)
+    async def _fetch(
+        self, query: _Query, conn: Optional[Connection] = None, **params: Any
+    ) -> list[Record]:
+        conn = conn or self._pool
+        return await conn.fetch(query.sql, *query.args(**params))
+
+    def _cursor(self, query: _Query, conn: Connection, **params: Any) -> CursorFactory:
+        return conn.cursor(
+            query.sql, *query.args(**params), prefetch=self.CURSOR_PREFETCH
+        )
 
     def _gen_id(self) -> str:
         return f"{self.ID_PREFIX}-{uuid.uuid4()}"
 
     def _to_values(self, item: ServiceAccount) -> dict[str, Any]:
-        payload = asdict(item)
         return {
-            "id": payload.pop("id"),
-            "name": payload.pop("name"),
-            "owner": payload.pop("owner"),
-            "created_at": payload.pop("created_at"),
-            "payload": payload,
+            "id": item.id,
+            "name": item.name,
+            "owner": item.owner,
+            "created_at": item.created_at,
+            "payload": {name: getattr(item, name) for name in _PAYLOAD_FIELDS},
         }
 
     def _from_record(self, record: Record) -> ServiceAccount:
-        payload = json.loads(record["payload"])
-        payload["id"] = record["id"]
-        payload["name"] = record["name"]
-        payload["owner"] = record["owner"]
-        payload["created_at"] = record["created_at"]
-        return ServiceAccount(**payload)
+        return ServiceAccount(
+            id=record["id"],
+            name=record["name"],
+            owner=record["owner"],
+            created_at=record["created_at"],
+            **record["payload"],
+        )
 
     @trace
     async def create(self, data: ServiceAccountData) -> ServiceAccount:
         entry = ServiceAccount.from_data_obj(self._gen_id(), data)
         values = self._to_values(entry)
-        query = self._table.insert().values(values)
         try:
-            await self._execute(query)
+            await self._execute(self._create_query, **values)
         except UniqueViolationError:
             raise ExistsError
         return entry
 
     @trace
     async def get(self, id: str) -> ServiceAccount:
-        query = self._table.select(self._table.c.id == id)
-        record = await self._fetchrow(query)
+        record = await self._fetchrow(self._get_query, id=id)
         if not record:
             raise NotExistsError
         return self._from_record(record)
@@ -120,27 +179,46 @@ class PostgresStorage(Storage):
         name: str,
         owner: str,
     ) -> ServiceAccount:
-        query = (
-            self._table.select()
-            .where(self._table.c.owner == owner)
-            .where(self._table.c.name == name)
+        record = await self._fetchrow(self._get_by_name_query, name=name, owner=owner)
+        if not record:
+            raise NotExistsError
+        return self._from_record(record)
+
+    @trace
+    async def get_by_id_or_name(
+        self,
+        id_or_name: str,
+        owner: str,
+    ) -> ServiceAccount:
+        record = await self._fetchrow(
+            self._get_by_id_or_name_query, id_or_name=id_or_name, owner=owner
         )
-        record = await self._fetchrow(query)
         if not record:
             raise NotExistsError
         return self._from_record(record)
 
     async def delete(self, id: str) -> None:
-        query = self._table.delete().where(self._table.c.id == id)
-        await self._execute(query)
+        await self._execute(self._delete_query, id=id)
+
+    @trace
+    async def list_all(
+        self,
+        owner: Optional[str] = None,
+    ) -> list[ServiceAccount]:
+        if owner is None:
+            records = await self._fetch(self._list_query)
+        else:
+            records = await self._fetch(self._list_by_owner_query, owner=owner)
+        return [self._from_record(record) for record in records]
 
     async def list(
         self,
         owner: Optional[str] = None,
     ) -> AsyncIterator[ServiceAccount]:
-        query = self._table.select()
-        if owner is not None:
-            query = query.where(self._table.c.owner == owner)
+        if owner is None:
+            query, params = self._list_query, {}
+        else:
+            query, params = self._list_by_owner_query, {"owner": owner}
         async with self._pool.acquire() as conn, conn.transaction():
-            async for record in self._cursor(query, conn=conn):
+            async for record in self._cursor(query, conn=conn, **params):
                 yield self._from_record(record)
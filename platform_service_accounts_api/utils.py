@@ -1,11 +1,20 @@
 import asyncio
-import json
 import logging
 from collections.abc import AsyncGenerator, AsyncIterator
 from contextlib import asynccontextmanager, suppress
-from typing import TypeVar
+from typing import Any, Generic, TypeVar
 
 import aiohttp.web
+import orjson
+from aiohttp.web_exceptions import HTTPOk
+
+
+def json_response(
+    data: Any, *, status: int = HTTPOk.status_code
+) -> aiohttp.web.Response:
+    return aiohttp.web.Response(
+        body=orjson.dumps(data), status=status, content_type="application/json"
+    )
 
 
 def accepts_ndjson(request: aiohttp.web.Request) -> bool:
@@ -29,19 +38,22 @@ async def ndjson_error_handler(
         )
         logging.exception(msg_str)
         payload = {"error": msg_str}
-        await response.write(json.dumps(payload).encode())
+        await response.write(orjson.dumps(payload))
 
 
 T_co = TypeVar("T_co", covariant=True)
 T_contra = TypeVar("T_contra", contravariant=True)
 
 
-@asynccontextmanager
-async def auto_close(
-    gen: AsyncGenerator[T_co, T_contra]
-) -> AsyncIterator[AsyncGenerator[T_co, T_contra]]:
-    try:
-        yield gen
-    finally:
+class auto_close(Generic[T_co, T_contra]):
+    __slots__ = ("_gen",)
+
+    def __init__(self, gen: AsyncGenerator[T_co, T_contra]) -> None:
+        self._gen = gen
+
+    async def __aenter__(self) -> AsyncGenerator[T_co, T_contra]:
+        return self._gen
+
+    async def __aexit__(self, *args: Any) -> None:
         with suppress(StopIteration):
-            await gen.aclose()
+            await self._gen.aclose()
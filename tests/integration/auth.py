@@ -63,6 +63,7 @@ def _auth_server(
     auth_name: str,
     auth_jwt_secret: str,
     _auth_url: URL,
+    _docker_images: None,
 ) -> Iterator[URL]:
 
     if _auth_url:
@@ -102,12 +103,11 @@ async def wait_for_auth_server(
 ) -> None:
     last_exc = None
     try:
-        async with timeout(timeout_s):
+        async with timeout(timeout_s), AuthClient(url=url, token="") as auth_client:
             while True:
                 try:
-                    async with AuthClient(url=url, token="") as auth_client:
-                        await auth_client.ping()
-                        break
+                    await auth_client.ping()
+                    break
                 except (AssertionError, OSError, aiohttp.ClientError) as exc:
                     last_exc = exc
                 logger.debug(f"waiting for {url}: {last_exc}")
@@ -116,13 +116,13 @@ async def wait_for_auth_server(
         pytest.fail(f"failed to connect to {url}: {last_exc}")
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 async def auth_server(_auth_server: URL) -> AsyncIterator[URL]:
     await wait_for_auth_server(_auth_server)
     yield _auth_server
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def token_factory(auth_jwt_secret: str) -> Callable[[str], str]:
     def _factory(identity: str) -> str:
         payload = {claim: identity for claim in JWT_IDENTITY_CLAIM_OPTIONS}
@@ -131,7 +131,7 @@ def token_factory(auth_jwt_secret: str) -> Callable[[str], str]:
     return _factory
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def admin_token(token_factory: Callable[[str], str]) -> str:
     return token_factory("admin")
 
@@ -147,13 +147,13 @@ def no_claim_token(auth_jwt_secret: str) -> str:
     return jwt.encode(payload, auth_jwt_secret, algorithm="HS256")
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 async def auth_client(auth_server: URL, admin_token: str) -> AsyncIterator[AuthClient]:
     async with AuthClient(url=auth_server, token=admin_token) as client:
         yield client
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def auth_config(auth_server: URL, admin_token: str) -> PlatformAuthConfig:
     return PlatformAuthConfig(url=auth_server, token=admin_token)
 
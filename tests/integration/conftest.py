@@ -1,8 +1,11 @@
+import asyncio
+import base64
+import json
 import logging
 import secrets
 import subprocess
 import time
-from collections.abc import AsyncIterator, Callable
+from collections.abc import AsyncIterator, Callable, Iterator
 from contextlib import asynccontextmanager
 from dataclasses import dataclass
 from typing import Any
@@ -10,6 +13,7 @@ from typing import Any
 import aiohttp
 import aiohttp.web
 import pytest
+import uvloop
 from yarl import URL
 
 from platform_service_accounts_api.config import (
@@ -34,13 +38,25 @@ def random_name(length: int = 8) -> str:
     return secrets.token_hex(length // 2 + length % 2)[:length]
 
 
-@pytest.fixture
+def decode_sa_token(token: str) -> dict[str, Any]:
+    return json.loads(base64.b64decode(token))
+
+
+@pytest.fixture(scope="session")
+def event_loop() -> Iterator[asyncio.AbstractEventLoop]:
+    # Same loop implementation as the service itself runs on
+    loop = uvloop.new_event_loop()
+    yield loop
+    loop.close()
+
+
+@pytest.fixture(scope="session")
 async def client() -> AsyncIterator[aiohttp.ClientSession]:
     async with aiohttp.ClientSession() as session:
         yield session
 
 
-@pytest.fixture
+@pytest.fixture(scope="module")
 def config_factory(
     auth_config: PlatformAuthConfig,
     postgres_config: PostgresConfig,
@@ -49,7 +65,7 @@ def config_factory(
         defaults = dict(
             server=ServerConfig(host="0.0.0.0", port=8080),
             platform_auth=auth_config,
-            cors=CORSConfig(allowed_origins=["https://neu.ro"]),
+            cors=CORSConfig(allowed_origins=("https://neu.ro",)),
             sentry=None,
             postgres=postgres_config,
             api_base_url=URL("https://dev.neu.ro/api/v1"),
@@ -60,7 +76,7 @@ def config_factory(
     return _f
 
 
-@pytest.fixture
+@pytest.fixture(scope="module")
 def config(
     config_factory: Callable[..., Config],
 ) -> Config:
@@ -75,15 +91,16 @@ class ApiAddress:
 
 @asynccontextmanager
 async def create_local_app_server(
-    app: aiohttp.web.Application, port: int = 8080
+    app: aiohttp.web.Application, port: int = 0
 ) -> AsyncIterator[ApiAddress]:
     runner = aiohttp.web.AppRunner(app)
     try:
         await runner.setup()
-        api_address = ApiAddress("0.0.0.0", port)
-        site = aiohttp.web.TCPSite(runner, api_address.host, api_address.port)
+        host = "0.0.0.0"
+        site = aiohttp.web.TCPSite(runner, host, port)
         await site.start()
-        yield api_address
+        # Port 0 lets the OS pick a free port, read back the one it bound
+        yield ApiAddress(host, runner.addresses[0][1])
     finally:
         await runner.shutdown()
         await runner.cleanup()
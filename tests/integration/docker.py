@@ -1,9 +1,12 @@
 import os
 from collections.abc import Iterator
+from concurrent.futures import ThreadPoolExecutor
 from typing import Any
 
 import pytest
 from docker import DockerClient
+from docker.errors import ImageNotFound
+from yarl import URL
 
 PYTEST_REUSE_DOCKER_OPT = "--reuse-docker"
 
@@ -31,3 +34,22 @@ def docker_client() -> Iterator[DockerClient]:
     client = DockerClient()
     yield client
     client.close()
+
+
+def _is_image_missing(docker_client: DockerClient, image: str) -> bool:
+    try:
+        docker_client.images.get(image)
+    except ImageNotFound:
+        return True
+    return False
+
+
+@pytest.fixture(scope="session")
+def _docker_images(
+    docker_client: DockerClient, auth_image: str, postgres_image: str, _auth_url: URL
+) -> None:
+    # Pull missing images concurrently instead of one by one in `run`
+    images = [postgres_image] if _auth_url else [auth_image, postgres_image]
+    missing = [image for image in images if _is_image_missing(docker_client, image)]
+    with ThreadPoolExecutor() as executor:
+        list(executor.map(docker_client.images.pull, missing))
@@ -14,17 +14,20 @@ from platform_service_accounts_api.config_factory import EnvironConfigFactory
 from platform_service_accounts_api.postgres import MigrationRunner, create_postgres_pool
 
 
+@pytest.fixture(scope="session")
+def postgres_image() -> str:
+    return "postgres:11.3"
+
+
 @pytest.fixture(scope="session")
 def _postgres_dsn(
     docker_client: DockerClient,
     in_docker: bool,
     reuse_docker: bool,
-    auth_image: str,
-    auth_name: str,
-    auth_jwt_secret: str,
+    postgres_image: str,
+    _docker_images: None,
 ) -> Iterator[str]:
 
-    image_name = "postgres:11.3"
     container_name = "postgres"
 
     try:
@@ -39,7 +42,7 @@ def _postgres_dsn(
 
     # `run` performs implicit `pull`
     container = docker_client.containers.run(
-        image=image_name,
+        image=postgres_image,
         name=container_name,
         publish_all_ports=True,
         stdout=False,
@@ -75,13 +78,13 @@ async def _wait_for_postgres_server(
         time.sleep(interval_s)
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 async def postgres_dsn(_postgres_dsn: str) -> str:
     await _wait_for_postgres_server(_postgres_dsn)
     return _postgres_dsn
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 async def postgres_config(postgres_dsn: str) -> AsyncIterator[PostgresConfig]:
 
     db_config = PostgresConfig(
@@ -96,7 +99,13 @@ async def postgres_config(postgres_dsn: str) -> AsyncIterator[PostgresConfig]:
     await migration_runner.downgrade()
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 async def postgres_pool(postgres_config: PostgresConfig) -> AsyncIterator[Pool]:
     async with create_postgres_pool(postgres_config) as pool:
         yield pool
+
+
+@pytest.fixture
+async def _clean_db(postgres_pool: Pool) -> None:
+    # Migrations only run once per session, so empty the table between tests
+    await postgres_pool.execute("TRUNCATE service_accounts")
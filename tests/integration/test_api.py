@@ -1,10 +1,11 @@
-import base64
-import json
 from collections.abc import AsyncIterator, Callable
 from dataclasses import dataclass, replace
-from datetime import datetime
+from datetime import datetime, timezone
+from functools import cached_property
+from typing import Any
 
 import aiohttp
+import orjson
 import pytest
 from aiohttp import ClientResponseError
 from aiohttp.web import HTTPOk
@@ -16,40 +17,43 @@ from aiohttp.web_exceptions import (
     HTTPNotFound,
     HTTPUnauthorized,
 )
+from asyncpg import Pool
 from neuro_auth_client import AuthClient, User
 
 from platform_service_accounts_api.api import create_app
 from platform_service_accounts_api.config import Config
+from platform_service_accounts_api.storage.base import ServiceAccountData
+from platform_service_accounts_api.storage.postgres import PostgresStorage
 
 from .auth import _User
-from .conftest import ApiAddress, create_local_app_server
+from .conftest import ApiAddress, create_local_app_server, decode_sa_token
 
 
 @dataclass(frozen=True)
 class ServiceAccountsApiEndpoints:
     address: ApiAddress
 
-    @property
+    @cached_property
     def server_base_url(self) -> str:
         return f"http://{self.address.host}:{self.address.port}"
 
-    @property
+    @cached_property
     def api_v1_endpoint(self) -> str:
         return f"{self.server_base_url}/api/v1"
 
-    @property
+    @cached_property
     def ping_url(self) -> str:
         return f"{self.api_v1_endpoint}/ping"
 
-    @property
+    @cached_property
     def secured_ping_url(self) -> str:
         return f"{self.api_v1_endpoint}/secured-ping"
 
-    @property
+    @cached_property
     def openapi_json_url(self) -> str:
         return f"{self.server_base_url}/api/docs/v1/service_accounts/swagger.json"
 
-    @property
+    @cached_property
     def accounts_url(self) -> str:
         return f"{self.server_base_url}/api/v1/service_accounts"
 
@@ -57,33 +61,53 @@ class ServiceAccountsApiEndpoints:
         return f"{self.accounts_url}/{id}"
 
 
-@pytest.fixture
+@pytest.fixture(scope="module")
 async def service_accounts_api(
     config: Config,
 ) -> AsyncIterator[ServiceAccountsApiEndpoints]:
     app = await create_app(config)
-    async with create_local_app_server(app, port=8080) as address:
+    async with create_local_app_server(app) as address:
         yield ServiceAccountsApiEndpoints(address=address)
 
 
+@pytest.fixture
+async def created_account(
+    service_accounts_api: ServiceAccountsApiEndpoints,
+    regular_user: _User,
+    client: aiohttp.ClientSession,
+) -> dict[str, Any]:
+    async with client.post(
+        url=service_accounts_api.accounts_url,
+        json={
+            "name": "test",
+            "default_cluster": "default",
+            "default_project": "some-project",
+        },
+        headers=regular_user.headers,
+    ) as resp:
+        assert resp.status == HTTPCreated.status_code, await resp.text()
+        return await resp.json(loads=orjson.loads)
+
+
+@pytest.mark.usefixtures("_clean_db")
 class TestApi:
     async def test_doc_available_when_enabled(
         self, config: Config, client: aiohttp.ClientSession
     ) -> None:
         config = replace(config, enable_docs=True)
         app = await create_app(config)
-        async with create_local_app_server(app, port=8080) as address:
+        async with create_local_app_server(app) as address:
             endpoints = ServiceAccountsApiEndpoints(address=address)
             async with client.get(endpoints.openapi_json_url) as resp:
                 assert resp.status == HTTPOk.status_code
-                assert await resp.json()
+                assert await resp.json(loads=orjson.loads)
 
     async def test_no_docs_when_disabled(
         self, config: Config, client: aiohttp.ClientSession
     ) -> None:
         config = replace(config, enable_docs=False)
         app = await create_app(config)
-        async with create_local_app_server(app, port=8080) as address:
+        async with create_local_app_server(app) as address:
             endpoints = ServiceAccountsApiEndpoints(address=address)
             async with client.get(endpoints.openapi_json_url) as resp:
                 assert resp.status == HTTPNotFound.status_code
@@ -203,6 +227,60 @@ class TestApi:
             assert resp.headers["Access-Control-Allow-Credentials"] == "true"
             assert resp.headers["Access-Control-Allow-Methods"] == "GET"
 
+    @pytest.mark.parametrize(
+        "method,path",
+        [
+            ("GET", ""),
+            ("POST", ""),
+            ("GET", "/test"),
+            ("DELETE", "/test"),
+        ],
+    )
+    async def test_accounts_no_token_unauthorized(
+        self,
+        service_accounts_api: ServiceAccountsApiEndpoints,
+        client: aiohttp.ClientSession,
+        method: str,
+        path: str,
+    ) -> None:
+        url = service_accounts_api.accounts_url + path
+        async with client.request(method, url, json={}) as resp:
+            assert resp.status == HTTPUnauthorized.status_code, await resp.text()
+
+    async def test_accounts_options_no_token(
+        self,
+        service_accounts_api: ServiceAccountsApiEndpoints,
+        client: aiohttp.ClientSession,
+    ) -> None:
+        async with client.options(
+            service_accounts_api.accounts_url,
+            headers={
+                "Origin": "https://neu.ro",
+                "Access-Control-Request-Method": "POST",
+            },
+        ) as resp:
+            assert resp.status == HTTPOk.status_code, await resp.text()
+            assert resp.headers["Access-Control-Allow-Origin"] == "https://neu.ro"
+            assert resp.headers["Access-Control-Allow-Methods"] == "POST"
+
+    async def test_accounts_options_unknown_origin(
+        self,
+        service_accounts_api: ServiceAccountsApiEndpoints,
+        client: aiohttp.ClientSession,
+    ) -> None:
+        async with client.options(
+            service_accounts_api.accounts_url,
+            headers={
+                "Origin": "http://unknown",
+                "Access-Control-Request-Method": "POST",
+            },
+        ) as resp:
+            assert resp.status == HTTPForbidden.status_code, await resp.text()
+            assert await resp.text() == (
+                "CORS preflight request failed: "
+                "origin 'http://unknown' is not allowed"
+            )
+
     async def make_subrole(self, user: _User, auth_client: AuthClient) -> str:
         role_name = f"{user.name}/roles/test"
         role = User(name=role_name)
@@ -237,7 +315,7 @@ class TestApi:
             headers=regular_user.headers,
         ) as resp:
             assert resp.status == HTTPCreated.status_code, await resp.text()
-            payload = await resp.json()
+            payload = await resp.json(loads=orjson.loads)
             assert payload["name"] == sa_name
             assert payload["owner"] == regular_user.name
             assert payload["default_cluster"] == "default"
@@ -247,7 +325,7 @@ class TestApi:
             assert "id" in payload
             token = payload["token"]
 
-        token_data = json.loads(base64.b64decode(token.encode()).decode())
+        token_data = decode_sa_token(token)
         assert token_data["cluster"] == "default"
         assert token_data["url"] == "https://dev.neu.ro/api/v1"
         assert token_data["project_name"] == "some-project"
@@ -271,11 +349,11 @@ class TestApi:
             headers=regular_user.headers,
         ) as resp:
             assert resp.status == HTTPCreated.status_code, await resp.text()
-            payload = await resp.json()
+            payload = await resp.json(loads=orjson.loads)
             role_name = payload["role"]
             token = payload["token"]
 
-        token_data = json.loads(base64.b64decode(token.encode()).decode())
+        token_data = decode_sa_token(token)
         assert token_data["cluster"] == "default"
         assert token_data["url"] == "https://dev.neu.ro/api/v1"
         assert token_data["project_name"] == "some-project"
@@ -318,7 +396,7 @@ class TestApi:
             headers=regular_user.headers,
         ) as resp:
             assert resp.status == HTTPBadRequest.status_code, await resp.text()
-            payload = await resp.json()
+            payload = await resp.json(loads=orjson.loads)
             assert "Invalid service account name" in payload["error"]
 
     async def test_account_create_no_cluster(
@@ -334,7 +412,7 @@ class TestApi:
             headers=regular_user.headers,
         ) as resp:
             assert resp.status == HTTPBadRequest.status_code, await resp.text()
-            payload = await resp.json()
+            payload = await resp.json(loads=orjson.loads)
             assert "Missing data for required field" in payload["error"]
 
     async def test_account_create_default_org(
@@ -356,7 +434,7 @@ class TestApi:
             headers=regular_user.headers,
         ) as resp:
             assert resp.status == HTTPCreated.status_code, await resp.text()
-            payload = await resp.json()
+            payload = await resp.json(loads=orjson.loads)
             assert payload["name"] == "sa-name"
             assert payload["owner"] == regular_user.name
             assert payload["default_cluster"] == "default"
@@ -367,7 +445,7 @@ class TestApi:
             assert "id" in payload
             token = payload["token"]
 
-        token_data = json.loads(base64.b64decode(token.encode()).decode())
+        token_data = decode_sa_token(token)
         assert token_data["cluster"] == "default"
         assert token_data["url"] == "https://dev.neu.ro/api/v1"
         assert token_data["org_name"] == "some-org"
@@ -385,29 +463,18 @@ class TestApi:
         regular_user: _User,
         client: aiohttp.ClientSession,
         auth_client: AuthClient,
+        created_account: dict[str, Any],
     ) -> None:
-        sa_name = "test"
+        sa_name = created_account["name"]
         role_name = f"{regular_user.name}/service-accounts/{sa_name}"
-
-        async with client.post(
-            url=service_accounts_api.accounts_url,
-            json={
-                "name": sa_name,
-                "default_cluster": "default",
-                "default_project": "some-project",
-            },
-            headers=regular_user.headers,
-        ) as resp:
-            assert resp.status == HTTPCreated.status_code, await resp.text()
-            payload = await resp.json()
-            account_id = payload["id"]
+        account_id = created_account["id"]
 
         async with client.get(
             url=service_accounts_api.account_url(account_id),
             headers=regular_user.headers,
         ) as resp:
             assert resp.status == HTTPOk.status_code, await resp.text()
-            payload = await resp.json()
+            payload = await resp.json(loads=orjson.loads)
             assert "token" not in payload
             assert payload["id"] == account_id
             assert payload["name"] == sa_name
@@ -424,29 +491,18 @@ class TestApi:
         regular_user: _User,
         client: aiohttp.ClientSession,
         auth_client: AuthClient,
+        created_account: dict[str, Any],
     ) -> None:
-        sa_name = "test"
+        sa_name = created_account["name"]
         role_name = f"{regular_user.name}/service-accounts/{sa_name}"
-
-        async with client.post(
-            url=service_accounts_api.accounts_url,
-            json={
-                "name": sa_name,
-                "default_cluster": "default",
-                "default_project": "some-project",
-            },
-            headers=regular_user.headers,
-        ) as resp:
-            assert resp.status == HTTPCreated.status_code, await resp.text()
-            payload = await resp.json()
-            account_id = payload["id"]
+        account_id = created_account["id"]
 
         async with client.get(
-            url=service_accounts_api.account_url("test"),
+            url=service_accounts_api.account_url(sa_name),
             headers=regular_user.headers,
         ) as resp:
             assert resp.status == HTTPOk.status_code, await resp.text()
-            payload = await resp.json()
+            payload = await resp.json(loads=orjson.loads)
             assert "token" not in payload
             assert payload["id"] == account_id
             assert payload["name"] == sa_name
@@ -468,7 +524,7 @@ class TestApi:
             headers=regular_user.headers,
         ) as resp:
             assert resp.status == HTTPOk.status_code, await resp.text()
-            payloads = await resp.json()
+            payloads = await resp.json(loads=orjson.loads)
             assert len(payloads) == 0
 
     async def test_accounts_list_one(
@@ -477,29 +533,18 @@ class TestApi:
         regular_user: _User,
         client: aiohttp.ClientSession,
         auth_client: AuthClient,
+        created_account: dict[str, Any],
     ) -> None:
-        sa_name = "test"
+        sa_name = created_account["name"]
         role_name = f"{regular_user.name}/service-accounts/{sa_name}"
-
-        async with client.post(
-            url=service_accounts_api.accounts_url,
-            json={
-                "name": sa_name,
-                "default_cluster": "default",
-                "default_project": "some-project",
-            },
-            headers=regular_user.headers,
-        ) as resp:
-            assert resp.status == HTTPCreated.status_code, await resp.text()
-            payload = await resp.json()
-            account_id = payload["id"]
+        account_id = created_account["id"]
 
         async with client.get(
             url=service_accounts_api.accounts_url,
             headers=regular_user.headers,
         ) as resp:
             assert resp.status == HTTPOk.status_code, await resp.text()
-            payloads = await resp.json()
+            payloads = await resp.json(loads=orjson.loads)
             assert len(payloads) == 1
             payload = payloads[0]
             assert "token" not in payload
@@ -517,41 +562,32 @@ class TestApi:
         service_accounts_api: ServiceAccountsApiEndpoints,
         regular_user: _User,
         client: aiohttp.ClientSession,
-        auth_client: AuthClient,
+        postgres_pool: Pool,
     ) -> None:
-        async with client.post(
-            url=service_accounts_api.accounts_url,
-            json={
-                "name": "test1",
-                "default_cluster": "default",
-                "default_project": "some-project",
-            },
-            headers=regular_user.headers,
-        ) as resp:
-            assert resp.status == HTTPCreated.status_code, await resp.text()
-            payload = await resp.json()
-            account_id1 = payload["id"]
-
-        async with client.post(
-            url=service_accounts_api.accounts_url,
-            json={
-                "name": "test2",
-                "default_cluster": "default",
-                "default_project": "some-project",
-            },
-            headers=regular_user.headers,
-        ) as resp:
-            assert resp.status == HTTPCreated.status_code, await resp.text()
-            payload = await resp.json()
-            account_id2 = payload["id"]
+        # Listing does not touch auth roles, so insert rows without the API
+        storage = PostgresStorage(postgres_pool)
+        account_ids: set[str] = set()
+        for name in ("test1", "test2"):
+            account = await storage.create(
+                ServiceAccountData(
+                    name=name,
+                    owner=regular_user.name,
+                    role=f"{regular_user.name}/service-accounts/{name}",
+                    default_cluster="default",
+                    default_project="some-project",
+                    default_org=None,
+                    created_at=datetime.now(timezone.utc),
+                )
+            )
+            account_ids.add(account.id)
 
         async with client.get(
             url=service_accounts_api.accounts_url,
             headers=regular_user.headers,
         ) as resp:
             assert resp.status == HTTPOk.status_code, await resp.text()
-            payload = await resp.json()
-            assert {item["id"] for item in payload} == {account_id1, account_id2}
+            payload = await resp.json(loads=orjson.loads)
+            assert {item["id"] for item in payload} == account_ids
 
     async def test_account_delete(
         self,
@@ -559,23 +595,12 @@ class TestApi:
         regular_user: _User,
         client: aiohttp.ClientSession,
         auth_client: AuthClient,
+        created_account: dict[str, Any],
     ) -> None:
-        sa_name = "test"
+        sa_name = created_account["name"]
         role_name = f"{regular_user.name}/service-accounts/{sa_name}"
-
-        async with client.post(
-            url=service_accounts_api.accounts_url,
-            json={
-                "name": sa_name,
-                "default_cluster": "default",
-                "default_project": "some-project",
-            },
-            headers=regular_user.headers,
-        ) as resp:
-            assert resp.status == HTTPCreated.status_code, await resp.text()
-            payload = await resp.json()
-            account_id = payload["id"]
-            token = payload["token"]
+        account_id = created_account["id"]
+        token = created_account["token"]
 
         async with client.delete(
             url=service_accounts_api.account_url(account_id),
@@ -583,75 +608,30 @@ class TestApi:
         ) as resp:
             assert resp.status == HTTPNoContent.status_code, await resp.text()
 
-        token_data = json.loads(base64.b64decode(token.encode()).decode())
+        token_data = decode_sa_token(token)
         auth_token = token_data["token"]
 
         with pytest.raises(ClientResponseError):
             await auth_client.get_user(role_name, token=auth_token)
 
+    @pytest.mark.parametrize("recreate_role", [False, True])
     async def test_account_delete_role_deleted(
         self,
         service_accounts_api: ServiceAccountsApiEndpoints,
         regular_user: _User,
         client: aiohttp.ClientSession,
         auth_client: AuthClient,
+        created_account: dict[str, Any],
+        recreate_role: bool,
     ) -> None:
-        sa_name = "test"
-        role_name = f"{regular_user.name}/service-accounts/{sa_name}"
-
-        async with client.post(
-            url=service_accounts_api.accounts_url,
-            json={
-                "name": sa_name,
-                "default_cluster": "default",
-                "default_project": "some-project",
-            },
-            headers=regular_user.headers,
-        ) as resp:
-            assert resp.status == HTTPCreated.status_code, await resp.text()
-            payload = await resp.json()
-            account_id = payload["id"]
-
-        # Drop role
-        path = auth_client._get_user_path(role_name)
-        async with auth_client._request(method="DELETE", path=path):
-            pass
-
-        async with client.delete(
-            url=service_accounts_api.account_url(account_id),
-            headers=regular_user.headers,
-        ) as resp:
-            assert resp.status == HTTPNoContent.status_code, await resp.text()
-
-    async def test_account_delete_role_recreated(
-        self,
-        service_accounts_api: ServiceAccountsApiEndpoints,
-        regular_user: _User,
-        client: aiohttp.ClientSession,
-        auth_client: AuthClient,
-    ) -> None:
-        sa_name = "test"
+        sa_name = created_account["name"]
         role_name = f"{regular_user.name}/service-accounts/{sa_name}"
+        account_id = created_account["id"]
 
-        async with client.post(
-            url=service_accounts_api.accounts_url,
-            json={
-                "name": sa_name,
-                "default_cluster": "default",
-                "default_project": "some-project",
-            },
-            headers=regular_user.headers,
-        ) as resp:
-            assert resp.status == HTTPCreated.status_code, await resp.text()
-            payload = await resp.json()
-            account_id = payload["id"]
-
-        # Drop role
-        path = auth_client._get_user_path(role_name)
-        async with auth_client._request(method="DELETE", path=path):
-            pass
+        await auth_client.delete_user(role_name)
 
-        await auth_client.add_user(User(role_name))
+        if recreate_role:
+            await auth_client.add_user(User(role_name))
 
         async with client.delete(
             url=service_accounts_api.account_url(account_id),
@@ -8,7 +8,7 @@ from tests.unit.test_in_memory_storage import TestStorage as _TestAStorage
 
 
 @pytest.fixture
-def postgres_storage(postgres_pool: Pool) -> PostgresStorage:
+def postgres_storage(postgres_pool: Pool, _clean_db: None) -> PostgresStorage:
     return PostgresStorage(postgres_pool)
 
 
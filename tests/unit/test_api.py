@@ -0,0 +1,126 @@
+from collections.abc import AsyncIterator, Awaitable, Callable, Sequence
+from dataclasses import replace
+from datetime import datetime, timezone
+from typing import Optional
+
+import aiohttp.web
+import orjson
+from aiohttp.test_utils import TestClient, TestServer
+from aiohttp.web import Request, StreamResponse, middleware
+from alembic.config import Config as AlembicConfig
+from yarl import URL
+
+from platform_service_accounts_api.api import (
+    NDJSON_FLUSH_SIZE,
+    ServiceAccountsApiHandler,
+    _dump_service_account,
+    _dump_service_account_with_token,
+)
+from platform_service_accounts_api.config import (
+    Config,
+    CORSConfig,
+    PlatformAuthConfig,
+    PostgresConfig,
+    ServerConfig,
+)
+from platform_service_accounts_api.schema import (
+    ServiceAccountSchema,
+    ServiceAccountWithTokenSchema,
+)
+from platform_service_accounts_api.service import (
+    ServiceAccount,
+    ServiceAccountWithToken,
+)
+
+ACCOUNT = ServiceAccountWithToken(
+    id="service-account-id",
+    name="test",
+    role="testowner/service-accounts/test",
+    owner="testowner",
+    default_cluster="default",
+    default_project="default-project",
+    default_org=None,
+    created_at=datetime(2021, 5, 28, 17, 14, 42, 458821, tzinfo=timezone.utc),
+    token="token",
+)
+
+
+def test_dump_service_account_matches_schema() -> None:
+    assert _dump_service_account(ACCOUNT) == ServiceAccountSchema().dump(ACCOUNT)
+
+
+def test_dump_service_account_with_token_matches_schema() -> None:
+    assert _dump_service_account_with_token(
+        ACCOUNT
+    ) == ServiceAccountWithTokenSchema().dump(ACCOUNT)
+
+
+class StubService:
+    def __init__(
+        self, accounts: Sequence[ServiceAccount], error: Optional[Exception] = None
+    ) -> None:
+        self._accounts = accounts
+        self._error = error
+
+    async def list(self, owner: str) -> AsyncIterator[ServiceAccount]:
+        for account in self._accounts:
+            yield account
+        if self._error is not None:
+            raise self._error
+
+
+@middleware
+async def _set_username(
+    request: Request, handler: Callable[[Request], Awaitable[StreamResponse]]
+) -> StreamResponse:
+    request["username"] = ACCOUNT.owner
+    return await handler(request)
+
+
+def _create_app(service: StubService) -> aiohttp.web.Application:
+    config = Config(
+        api_base_url=URL("https://dev.neu.ro/api/v1"),
+        server=ServerConfig(),
+        platform_auth=PlatformAuthConfig(url=URL("http://platformauthapi"), token=""),
+        cors=CORSConfig(),
+        postgres=PostgresConfig(postgres_dsn="", alembic=AlembicConfig()),
+    )
+    app = aiohttp.web.Application(middlewares=[_set_username])
+    app["service"] = service
+    ServiceAccountsApiHandler(app, config).register(app)
+    return app
+
+
+async def _list_ndjson(service: StubService) -> list[bytes]:
+    async with TestClient(TestServer(_create_app(service))) as client:
+        async with client.get("/", headers={"Accept": "application/x-ndjson"}) as resp:
+            assert resp.status == 200
+            assert resp.headers["Content-Type"] == "application/x-ndjson"
+            return (await resp.read()).split(b"\n")
+
+
+def _gen_accounts(count: int) -> list[ServiceAccount]:
+    return [replace(ACCOUNT, id=f"id-{index}") for index in range(count)]
+
+
+# Rows dump to ~250 bytes, so this spans a few NDJSON flushes
+NDJSON_ROWS = 3 * NDJSON_FLUSH_SIZE // 256
+
+
+async def test_list_ndjson_many() -> None:
+    accounts = _gen_accounts(NDJSON_ROWS)
+    lines = await _list_ndjson(StubService(accounts))
+    assert lines[-1] == b""
+    assert [orjson.loads(line) for line in lines[:-1]] == [
+        _dump_service_account(account) for account in accounts
+    ]
+
+
+async def test_list_ndjson_error_keeps_listed_rows() -> None:
+    accounts = _gen_accounts(NDJSON_ROWS)
+    lines = await _list_ndjson(StubService(accounts, RuntimeError("db went away")))
+    assert [orjson.loads(line) for line in lines[:-1]] == [
+        _dump_service_account(account) for account in accounts
+    ]
+    error = orjson.loads(lines[-1])["error"]
+    assert "RuntimeError: db went away" in error
@@ -62,9 +62,22 @@ def test_create(cert_authority_path: str, token_path: str) -> None:
             pool_max_size=500,
             alembic=ANY,
         ),
-        cors=CORSConfig(["https://domain1.com", "http://do.main"]),
+        cors=CORSConfig(("https://domain1.com", "http://do.main")),
         zipkin=ZipkinConfig(url=URL("http://zipkin:9411")),
         sentry=SentryConfig(dsn=URL("https://test.com"), cluster_name="test"),
         enable_docs=True,
         api_base_url=URL("https://dev.neu.ro/api/v1"),
     )
+
+
+def test_create_postgres_pool_min_exceeds_max() -> None:
+    environ = {"NP_DB_POSTGRES_POOL_MIN": "20", "NP_DB_POSTGRES_POOL_MAX": "10"}
+    with pytest.raises(ValueError, match="exceeds max size"):
+        EnvironConfigFactory(environ).create_postgres()
+
+
+def test_create_cors_strips_origins() -> None:
+    environ = {"NP_CORS_ORIGINS": " https://domain1.com, ,http://do.main "}
+    assert EnvironConfigFactory(environ).create_cors() == CORSConfig(
+        ("https://domain1.com", "http://do.main")
+    )
@@ -1,5 +1,5 @@
 import secrets
-from dataclasses import asdict, replace
+from dataclasses import fields, replace
 from datetime import datetime, timezone
 from typing import Any
 
@@ -14,6 +14,12 @@ from platform_service_accounts_api.storage.base import (
 from platform_service_accounts_api.storage.in_memory import InMemoryStorage
 
 
+CREATED_AT = datetime(2021, 5, 28, 17, 14, 42, 458821, tzinfo=timezone.utc)
+
+# Everything but the generated id (and the token of created accounts)
+DATA_FIELDS = tuple(field.name for field in fields(ServiceAccountData))
+
+
 @pytest.fixture
 def in_memory_storage() -> InMemoryStorage:
     return InMemoryStorage()
@@ -27,10 +33,8 @@ class TestStorage:
     def compare_data(
         self, data1: ServiceAccountData, data2: ServiceAccountData
     ) -> None:
-        d1 = asdict(data1)
-        d1.pop("id", None)
-        d2 = asdict(data2)
-        d2.pop("id", None)
+        d1 = {name: getattr(data1, name) for name in DATA_FIELDS}
+        d2 = {name: getattr(data2, name) for name in DATA_FIELDS}
         assert d1 == d2
 
     async def gen_data(self, **kwargs: Any) -> ServiceAccountData:
@@ -41,12 +45,10 @@ class TestStorage:
             default_cluster=secrets.token_hex(8),
             default_project=secrets.token_hex(8),
             default_org=None,
-            created_at=datetime.now(timezone.utc),
+            created_at=CREATED_AT,
         )
         # Updating this way so constructor call is typechecked properly
-        for key, value in kwargs.items():
-            data = replace(data, **{key: value})
-        return data
+        return replace(data, **kwargs)
 
     async def test_create_get(self, storage: Storage) -> None:
         data = await self.gen_data()
@@ -92,12 +94,41 @@ class TestStorage:
                 owner="wrong_owner",
             )
 
+    async def test_get_by_id_or_name(self, storage: Storage) -> None:
+        data = await self.gen_data()
+        created = await storage.create(data)
+        assert data.name is not None
+        by_id = await storage.get_by_id_or_name(created.id, owner=data.owner)
+        assert by_id.id == created.id
+        by_name = await storage.get_by_id_or_name(data.name, owner=data.owner)
+        assert by_name.id == created.id
+
+    async def test_get_by_id_or_name_wrong_owner(self, storage: Storage) -> None:
+        data = await self.gen_data()
+        created = await storage.create(data)
+        assert data.name is not None
+        with pytest.raises(NotExistsError):
+            await storage.get_by_id_or_name(data.name, owner="wrong_owner")
+        with pytest.raises(NotExistsError):
+            await storage.get_by_id_or_name(created.id, owner="wrong_owner")
+
     async def test_cannot_create_duplicate(self, storage: Storage) -> None:
         data = await self.gen_data()
         await storage.create(data)
         with pytest.raises(ExistsError):
             await storage.create(data)
 
+    async def test_create_after_delete_same_name(self, storage: Storage) -> None:
+        data = await self.gen_data()
+        created = await storage.create(data)
+        await storage.delete(created.id)
+        assert data.name is not None
+        with pytest.raises(NotExistsError):
+            await storage.get_by_name(name=data.name, owner=data.owner)
+        recreated = await storage.create(data)
+        account = await storage.get_by_name(name=data.name, owner=data.owner)
+        assert account.id == recreated.id
+
     async def test_list(self, storage: Storage) -> None:
         for name_id in range(5):
             for owner_id in range(5):
@@ -111,3 +142,15 @@ class TestStorage:
             found.append(item.name)
         assert len(found) == 5
         assert set(found) == {f"name-{index}" for index in range(5)}
+
+    async def test_list_all(self, storage: Storage) -> None:
+        for name_id in range(5):
+            for owner_id in range(5):
+                data = await self.gen_data(
+                    name=f"name-{name_id}",
+                    owner=f"owner-{owner_id}",
+                )
+                await storage.create(data)
+        found = await storage.list_all(owner="owner-2")
+        assert {item.name for item in found} == {f"name-{index}" for index in range(5)}
+        assert len(found) == 5
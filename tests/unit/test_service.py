@@ -1,6 +1,6 @@
 import base64
 import json
-from dataclasses import asdict, replace
+from dataclasses import replace
 from datetime import datetime, timezone
 from typing import Optional
 
@@ -16,6 +16,8 @@ from platform_service_accounts_api.storage.base import (
 )
 from platform_service_accounts_api.storage.in_memory import InMemoryStorage
 
+from tests.unit.test_in_memory_storage import DATA_FIELDS
+
 
 class MockAuthClient(AuthClient):
     def __init__(self) -> None:
@@ -56,16 +58,13 @@ class TestService:
         default_project="default-project",
         default_org=None,
     )
+    EXPECTED_ROLE = f"{CREATE_DATA.owner}/service-accounts/{CREATE_DATA.name}"
 
     def compare_data(
         self, data1: ServiceAccountData, data2: ServiceAccountData
     ) -> None:
-        d1 = asdict(data1)
-        d1.pop("id", None)
-        d1.pop("token", None)
-        d2 = asdict(data2)
-        d2.pop("id", None)
-        d2.pop("token", None)
+        d1 = {name: getattr(data1, name) for name in DATA_FIELDS}
+        d2 = {name: getattr(data2, name) for name in DATA_FIELDS}
         assert d1 == d2
 
     @pytest.fixture
@@ -86,23 +85,20 @@ class TestService:
         before_create = datetime.now(timezone.utc)
         account = await service.create(self.CREATE_DATA)
         after_create = datetime.now(timezone.utc)
-        expected_role = (
-            f"{self.CREATE_DATA.owner}/service-accounts/{self.CREATE_DATA.name}"
-        )
         assert account.id
         assert account.name == self.CREATE_DATA.name
-        assert account.role == expected_role
+        assert account.role == self.EXPECTED_ROLE
         assert account.owner == self.CREATE_DATA.owner
         assert account.default_cluster == self.CREATE_DATA.default_cluster
         assert account.created_at >= before_create
         assert account.created_at <= after_create
         token = account.token
         token_data = json.loads(base64.b64decode(token.encode()).decode())
-        assert token_data["token"] == f"token-{expected_role}"
+        assert token_data["token"] == f"token-{self.EXPECTED_ROLE}"
         assert token_data["cluster"] == self.CREATE_DATA.default_cluster
         assert token_data["url"] == "https://dev.neu.ro/api/v1"
         assert token_data["project_name"] == self.CREATE_DATA.default_project
-        assert mock_auth_client.created_users[0].name == expected_role
+        assert mock_auth_client.created_users[0].name == self.EXPECTED_ROLE
 
     async def test_create_no_name(
         self, service: AccountsService, mock_auth_client: MockAuthClient
@@ -116,6 +112,14 @@ class TestService:
         get_res = await service.get(account.id)
         self.compare_data(account, get_res)
 
+    async def test_get_by_id_or_name(self, service: AccountsService) -> None:
+        account = await service.create(self.CREATE_DATA)
+        assert account.name is not None
+        by_id = await service.get_by_id_or_name(account.id, account.owner)
+        self.compare_data(account, by_id)
+        by_name = await service.get_by_id_or_name(account.name, account.owner)
+        self.compare_data(account, by_name)
+
     async def test_list(self, service: AccountsService) -> None:
         account = await service.create(self.CREATE_DATA)
         async for list_res in service.list(owner=account.owner):
@@ -125,6 +129,15 @@ class TestService:
         async for _ in service.list(owner="test"):
             raise AssertionError
 
+    async def test_list_all(self, service: AccountsService) -> None:
+        account = await service.create(self.CREATE_DATA)
+        accounts = await service.list_all(owner=account.owner)
+        assert len(accounts) == 1
+        self.compare_data(account, accounts[0])
+
+    async def test_list_all_empty(self, service: AccountsService) -> None:
+        assert await service.list_all(owner="test") == []
+
     async def test_delete(
         self, service: AccountsService, mock_auth_client: MockAuthClient
     ) -> None: